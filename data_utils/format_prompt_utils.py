@@ -32,25 +32,19 @@ def generate_new_query_prompt(system_prompt="", task="", previous_actions=None,
 
 
 
-def generate_new_referring_prompt(referring_description="", element_format="", action_format="", value_format="",
-                              choices=None,split="4"):
-    referring_prompt = ""
-
+def referring_prompt_head(referring_description=""):
+    """Static part of the referring prompt that goes before the choices."""
     # Add description about how to format output
     if referring_description != "":
-        referring_prompt += referring_description
-        referring_prompt += "\n\n"
-
-    # Add element prediction format and choices
+        return referring_description + "\n\n"
+    return ""
 
 
-    # Prepare Option texts
-    # For exp {1, 2, 4}, generate option
-    # For element_atttribute, set options field at None
-    if choices:
-        choice_text = format_options(choices)
-        referring_prompt += choice_text
+def referring_prompt_tail(element_format="", action_format="", value_format=""):
+    """Static part of the referring prompt that goes after the choices."""
+    referring_prompt = ""
 
+    # Add element prediction format
     if element_format != "":
         referring_prompt += element_format
         referring_prompt += "\n\n"
@@ -67,23 +61,31 @@ def generate_new_referring_prompt(referring_description="", element_format="", a
 
     return referring_prompt
 
-def format_options(choices):
-    option_text = ""
-    abcd = ''
-    non_abcd = ''
 
-    multi_choice = ''
-    for multichoice_idx, choice in enumerate(choices):
-        multi_choice += f"{generate_option_name(multichoice_idx)}. {choice}\n"
-        abcd += f"{generate_option_name(multichoice_idx)}, "
+def generate_new_referring_prompt(referring_description="", element_format="", action_format="", value_format="",
+                              choices=None,split="4"):
+    referring_prompt = referring_prompt_head(referring_description)
+
+    # Prepare Option texts
+    # For exp {1, 2, 4}, generate option
+    # For element_atttribute, set options field at None
+    if choices:
+        choice_text = format_options(choices)
+        referring_prompt += choice_text
 
-        non_abcd = generate_option_name(multichoice_idx + 1)
+    referring_prompt += referring_prompt_tail(element_format, action_format, value_format)
+
+    return referring_prompt
 
-    multi_choice += f"{non_abcd}. None of the other options match the correct element or the action doesn't involve an element."
-    # option_text += abcd
-    option_text += f"If none of these elements match your target element or your target action doesn't involve an element, please select {non_abcd}.\n"
-    option_text += (multi_choice + '\n\n')
-    return option_text
+def format_options(choices):
+    non_abcd = generate_option_name(len(choices)) if choices else ''
+
+    # Collect the pieces and join once instead of growing a string per choice
+    parts = [f"If none of these elements match your target element or your target action doesn't involve an element, please select {non_abcd}.\n"]
+    for multichoice_idx, choice in enumerate(choices):
+        parts.append(f"{generate_option_name(multichoice_idx)}. {choice}\n")
+    parts.append(f"{non_abcd}. None of the other options match the correct element or the action doesn't involve an element.\n\n")
+    return "".join(parts)
 
 
 def generate_option_name(index):
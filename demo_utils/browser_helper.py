@@ -257,6 +257,16 @@ async def get_element_data(element, tag_name,viewport_size,seen_elements=[]):
         return None
 
 
+async def get_link_href(element):
+    '''
+         Return the absolute URL an anchor points to, or None if it has no usable href.
+    '''
+    try:
+        return await element.evaluate("a => a.href", timeout=0) or None
+    except Exception:
+        return None
+
+
 async def get_interactive_elements_with_playwright(page,viewport_size):
     interactive_elements_selectors = [
         'a', 'button',
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+
+from playwright.async_api import async_playwright
+
+from .browser_helper import normal_launch_async, normal_new_context_async
+
+# One Playwright driver per event loop, and one browser per launch configuration.
+# Agents get their own BrowserContext on top of a shared browser instead of cold-starting Chromium each time.
+# Call close_browser_pool() before the event loop ends; a pool left open is abandoned, not closed, on the next loop.
+logger = logging.getLogger(__name__)
+
+_playwright = None
+_loop = None
+_lock = None
+_browsers = {}
+
+
+def _pool_key(browser_config, headless, args):
+    return (browser_config.get("browser_app", "chrome"), headless, tuple(args or ()),
+            browser_config.get("cdp_endpoint"))
+
+
+def _get_lock():
+    """Return the pool lock of the running event loop, resetting the pool when the loop changed."""
+    global _playwright, _loop, _lock
+    loop = asyncio.get_running_loop()
+    if _loop is not loop:
+        # The driver and browsers of a previous event loop cannot be reused (or closed) from this one
+        if _playwright is not None or _browsers:
+            logger.warning("Event loop changed with %d pooled browser(s) still open; discarding them. "
+                           "Call close_browser_pool() before the event loop ends.", len(_browsers))
+        _playwright = None
+        _loop = loop
+        _lock = asyncio.Lock()
+        _browsers.clear()
+    return _lock
+
+
+async def _ensure_playwright():
+    # Caller must hold the pool lock, so concurrent agents start a single driver
+    global _playwright
+    if _playwright is None:
+        _playwright = await async_playwright().start()
+    return _playwright
+
+
+async def get_shared_browser(browser_config, headless=None, args=None):
+    """
+    Return the pooled browser for this configuration, launching it (or connecting over CDP) on first use.
+    """
+    headless = browser_config.get("headless", False) if headless is None else headless
+    args = browser_config.get("args") if args is None else args
+    async with _get_lock():
+        await _ensure_playwright()
+        key = _pool_key(browser_config, headless, args)
+        browser = _browsers.get(key)
+        if browser is None or not browser.is_connected():
+            if browser_config.get("cdp_endpoint"):
+                browser = await _playwright.chromium.connect_over_cdp(browser_config["cdp_endpoint"])
+            else:
+                browser = await normal_launch_async(_playwright, headless=headless, args=args)
+            _browsers[key] = browser
+        return browser
+
+
+async def acquire_context(browser_config, headless=None, args=None, **context_kwargs):
+    """Open a fresh, isolated context on the pooled browser matching `browser_config`."""
+    browser = await get_shared_browser(browser_config, headless=headless, args=args)
+    return await normal_new_context_async(browser, viewport=browser_config["viewport"], **context_kwargs)
+
+
+async def release_context(context):
+    """Give a context back to the pool. The context is closed, the browser behind it stays up."""
+    await context.close()
+
+
+async def close_browser_pool():
+    """
+    Close every pooled browser and stop the Playwright driver.
+    Must be awaited on the same event loop the pool was used on, before that loop ends.
+    """
+    global _playwright
+    async with _get_lock():
+        for browser in list(_browsers.values()):
+            try:
+                await browser.close()
+            except Exception:
+                pass
+        _browsers.clear()
+        if _playwright is not None:
+            await _playwright.stop()
+            _playwright = None
@@ -0,0 +1,123 @@
+import copy
+import os
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+try:
+    import tomllib
+
+    TomlDecodeError = tomllib.TOMLDecodeError
+
+    def _load_toml(path):
+        with open(path, 'rb') as f:
+            return tomllib.load(f)
+except ImportError:  # Python 3.10
+    import toml
+
+    TomlDecodeError = toml.TomlDecodeError
+
+    def _load_toml(path):
+        with open(path, 'r') as f:
+            return toml.load(f)
+
+# Parsed configs keyed by (absolute path, mtime), so agents created in the same process skip re-parsing
+_config_cache = {}
+
+
+def load_config(config_path):
+    """
+    Load a TOML config file.
+    Returns a fresh copy on every call, since callers update the config in place.
+    """
+    path = os.path.abspath(config_path)
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _config_cache:
+        _config_cache[key] = _load_toml(path)
+    return copy.deepcopy(_config_cache[key])
+
+
+@dataclass(frozen=True, slots=True)
+class BasicSettings:
+    save_file_dir: str = "webact_agent_files"
+    default_task: str = ""
+    default_website: str = ""
+    crawler_mode: bool = False
+    crawler_max_steps: int = 10
+    batch_log_writes: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class AgentSettings:
+    input_info: list = field(default_factory=lambda: ["screenshot"])
+    grounding_strategy: str = "text_choice_som"
+    max_auto_op: int = 50
+    max_continuous_no_op: int = 5
+    highlight: bool = False
+    max_history_in_prompt: int = 20
+    max_history_retain: int = 10000
+
+
+@dataclass(frozen=True, slots=True)
+class BrowserSettings:
+    headless: bool = False
+    args: list = field(default_factory=list)
+    browser_app: str = "chrome"
+    persistant: bool = False
+    persistant_user_path: str = ""
+    save_video: bool = False
+    viewport: dict = field(default_factory=lambda: {"width": 1280, "height": 720})
+    tracing: bool = False
+    trace: dict = field(default_factory=dict)
+    cdp_endpoint: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    basic: BasicSettings
+    agent: AgentSettings
+    browser: BrowserSettings
+
+
+GROUNDING_STRATEGIES = frozenset({"text_choice_som", "pixel_2_stage"})
+
+
+def _section(settings_cls, config, name):
+    section = config.get(name, {})
+    if not isinstance(section, dict):
+        raise ValueError(f"Config section [{name}] must be a table.")
+    # Unknown keys (e.g. api_key) stay in the raw config only
+    return settings_cls(**{f.name: section[f.name] for f in fields(settings_cls) if f.name in section})
+
+
+def build_settings(config):
+    """
+    Validate a raw config dict and freeze it into a Settings object.
+    Missing options are written back into `config` with their defaults, so the dict and Settings agree.
+    The agent reads hot-path options from Settings attributes instead of nested dict lookups.
+    """
+    settings = Settings(basic=_section(BasicSettings, config, "basic"),
+                        agent=_section(AgentSettings, config, "agent"),
+                        browser=_section(BrowserSettings, config, "browser"))
+
+    if settings.agent.grounding_strategy not in GROUNDING_STRATEGIES:
+        raise ValueError(f"Unsupported grounding_strategy '{settings.agent.grounding_strategy}', "
+                         f"expected one of: {', '.join(sorted(GROUNDING_STRATEGIES))}")
+    for name, value in (("crawler_max_steps", settings.basic.crawler_max_steps),
+                        ("max_auto_op", settings.agent.max_auto_op),
+                        ("max_continuous_no_op", settings.agent.max_continuous_no_op)):
+        if not isinstance(value, int) or value < 0:
+            raise ValueError(f"Config option '{name}' must be a non-negative integer, got {value!r}")
+    for name, value in (("max_history_in_prompt", settings.agent.max_history_in_prompt),
+                        ("max_history_retain", settings.agent.max_history_retain)):
+        if value is not None and (not isinstance(value, int) or value < 0):
+            raise ValueError(f"Config option '{name}' must be a non-negative integer, got {value!r}")
+    viewport = settings.browser.viewport
+    if not isinstance(viewport, dict) or not {"width", "height"} <= viewport.keys():
+        raise ValueError(f"Config option 'viewport' must have 'width' and 'height', got {viewport!r}")
+
+    for name in ("basic", "agent", "browser"):
+        section_settings = getattr(settings, name)
+        section = config.setdefault(name, {})
+        for f in fields(section_settings):
+            section.setdefault(f.name, getattr(section_settings, f.name))
+    return settings
@@ -2,8 +2,30 @@ import random
 
 
 def get_random_link(links):
+    """
+    Remove and return a random link from the list.
+    The chosen slot is swapped with the last one before popping, so the order of the remaining links is not kept.
+    """
     if len(links) == 0:
         return None
-    random_link = random.choice(links)
-    links.remove(random_link)
-    return random_link
\ No newline at end of file
+    i = random.randrange(len(links))
+    links[i], links[-1] = links[-1], links[i]
+    return links.pop()
+
+
+def link_key(link, page_url=None):
+    """Identify a link by its URL, falling back to (page URL, description) for anchors without an href."""
+    return link.get("href") or (page_url, link["description"])
+
+
+def build_link_frontier(links, visited=(), page_url=None):
+    """
+    Deduplicate links by URL (see link_key), dropping the ones already in `visited`.
+    Returns a dict used as an ordered set: link key -> link element.
+    """
+    frontier = {}
+    for link in links:
+        key = link_key(link, page_url)
+        if key not in visited and key not in frontier:
+            frontier[key] = link
+    return frontier
@@ -1,5 +1,6 @@
 import re
 import shlex
+import sys
 
 def format_choices(elements):
     converted_elements = []
@@ -129,7 +130,8 @@ def postprocess_action_lmm(text):
 
     value = re.search(r"VALUE: (.*)$", text, re.MULTILINE)
     value = value.group(1) if value is not None else ""
-    return selected_option, action.strip(), process_string(process_string(value.strip()))
+    # Interned so the action name hits the identity fast path in the agent's dispatch and set lookups
+    return selected_option, sys.intern(action.strip()), process_string(process_string(value.strip()))
 
 
 
@@ -224,7 +226,8 @@ def postprocess_action_lmm_pixel(text):
 
     value = re.search(r"VALUE: (.*)$", text, re.MULTILINE)
     value = value.group(1) if value is not None else ""
-    return selected_option, action.strip(), process_string(process_string(value.strip()))
+    # Interned so the action name hits the identity fast path in the agent's dispatch and set lookups
+    return selected_option, sys.intern(action.strip()), process_string(process_string(value.strip()))
 
 def process_string(input_string):
     if input_string.startswith('"') and input_string.endswith('"'):
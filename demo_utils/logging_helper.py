@@ -0,0 +1,75 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+# Queue listeners started by attach_queue_listener, keyed by logger name
+_listeners = {}
+
+
+class BatchedFileHandler(logging.FileHandler):
+    """
+    File handler that buffers formatted records and writes them out together.
+    Records are flushed in a single write once `capacity` records are pending, when a record at or above
+    `flush_level` arrives, or when the handler is flushed or closed.
+    """
+
+    def __init__(self, filename, mode='a', encoding=None, delay=False, capacity=64, flush_level=logging.WARNING):
+        super().__init__(filename, mode=mode, encoding=encoding, delay=delay)
+        self.capacity = capacity
+        self.flush_level = flush_level
+        self._pending = []
+
+    def emit(self, record):
+        try:
+            self._pending.append(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._pending) >= self.capacity or record.levelno >= self.flush_level:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._pending:
+                if self.stream is None:
+                    self.stream = self._open()
+                self.stream.write(''.join(self._pending))
+                self._pending.clear()
+            super().flush()
+        finally:
+            self.release()
+
+    def close(self):
+        # FileHandler.close() only flushes an open stream, so with delay=True pending records would be lost
+        self.flush()
+        super().close()
+
+
+def attach_queue_listener(logger, *handlers):
+    """
+    Route the logger's records through a queue so emitting never blocks on I/O.
+    The given handlers are driven by a background QueueListener thread, stopped at interpreter exit.
+    """
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+    _listeners[logger.name] = listener
+    return listener
+
+
+def flush_logger(logger):
+    """Write out everything logged so far, including records still waiting in the queue."""
+    listener = _listeners.get(logger.name)
+    if listener is None:
+        for handler in logger.handlers:
+            handler.flush()
+        return
+    # Stopping the listener drains the queue; restart it afterwards so logging keeps working
+    listener.stop()
+    for handler in listener.handlers:
+        handler.flush()
+    listener.start()
@@ -1,6 +1,7 @@
 import asyncio
 import os
 from webact.agent import WebActAgent
+from webact.demo_utils.browser_pool import close_browser_pool
 
 # Setup your API Key here, or pass through environment
 # os.environ["OPENAI_API_KEY"] = "Your API KEY Here"
@@ -13,6 +14,7 @@ async def run_agent():
         prediction_dict = await agent.predict()
         await agent.execute(prediction_dict)
     await agent.stop()
+    await close_browser_pool()
 
 if __name__ == "__main__":
     asyncio.run(run_agent())
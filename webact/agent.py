@@ -1,21 +1,32 @@
+import asyncio
 import json
 import logging
 import os
 import random
+import sys
 import traceback
+from collections import deque
 from datetime import datetime
+from itertools import islice
 from os.path import dirname
 
-import toml
-from playwright.async_api import async_playwright, Locator
+from playwright.async_api import Locator
 
 from .data_utils.format_prompt_utils import get_index_from_option_name, generate_new_query_prompt, \
-    generate_new_referring_prompt, format_options, generate_option_name
-from .demo_utils.browser_helper import normal_launch_async, normal_new_context_async, \
-    get_interactive_elements_with_playwright, select_option, saveconfig
-from .demo_utils.crawler_helper import get_random_link
+    referring_prompt_head, referring_prompt_tail, format_options, generate_option_name
+from .demo_utils.browser_helper import get_interactive_elements_with_playwright, get_link_href, select_option, \
+    saveconfig
+from .demo_utils.browser_pool import acquire_context, release_context
+from .demo_utils.config_helper import load_config, build_settings, TomlDecodeError
+from .demo_utils.crawler_helper import get_random_link, build_link_frontier
 from .demo_utils.format_prompt import format_choices, postprocess_action_lmm, postprocess_action_lmm_pixel
 from .demo_utils.inference_engine import engine_factory
+from .demo_utils.logging_helper import BatchedFileHandler, attach_queue_listener, flush_logger
+
+
+def _interned_set(names):
+    """Frozenset of interned action names, so lookups with interned parsed actions compare by identity."""
+    return frozenset(sys.intern(name) for name in names)
 
 
 class WebActAgent:
@@ -49,15 +60,17 @@ class WebActAgent:
                  },
                  rate_limit=-1,
                  model="gpt-4o",
-                 temperature=0.9
+                 temperature=0.9,
+                 batch_log_writes=False,
+                 cdp_endpoint=None,
+                 max_history_in_prompt=20,
+                 max_history_retain=10000
                  ):
 
         try:
             if config_path is not None:
-                with open(config_path,
-                          'r') as config:
-                    print(f"Configuration File Loaded - {config_path}")
-                    config = toml.load(config)
+                config = load_config(config_path)
+                print(f"Configuration File Loaded - {config_path}")
             else:
                 config = {
                     "basic": {
@@ -66,13 +79,16 @@ class WebActAgent:
                         "default_website": default_website,
                         "crawler_mode": crawler_mode,
                         "crawler_max_steps": crawler_max_steps,
+                        "batch_log_writes": batch_log_writes,
                     },
                     "agent": {
                         "input_info": input_info,
                         "grounding_strategy": grounding_strategy,
                         "max_auto_op": max_auto_op,
                         "max_continuous_no_op": max_continuous_no_op,
-                        "highlight": highlight
+                        "highlight": highlight,
+                        "max_history_in_prompt": max_history_in_prompt,
+                        "max_history_retain": max_history_retain
                     },
                     "openai": {
                         "rate_limit": rate_limit,
@@ -90,16 +106,19 @@ class WebActAgent:
                     "save_video": save_video,
                     "viewport": viewport,
                     "tracing": tracing,
-                    "trace": trace
+                    "trace": trace,
+                    "cdp_endpoint": cdp_endpoint
                 }
             })
 
         except FileNotFoundError:
             print(f"Error: File '{os.path.abspath(config_path)}' not found.")
-        except toml.TomlDecodeError:
+        except TomlDecodeError:
             print(f"Error: File '{os.path.abspath(config_path)}' is not a valid TOML file.")
 
         self.config = config
+        # Validated snapshot of the config for per-step reads; it also fills missing options into self.config
+        self.settings = build_settings(config)
         self.complete_flag = False
         self.session_control = {
             'active_page': None,
@@ -114,34 +133,69 @@ class WebActAgent:
                              "GO BACK", "GO FORWARD",
                              "TERMINATE", "SELECT", "TYPE", "GOTO", "MEMORIZE"]  # Define the list of actions here
 
-        self.no_value_op = ["CLICK", "PRESS ENTER", "HOVER", "SCROLL UP", "SCROLL DOWN", "NEW TAB", "CLOSE TAB",
-                            "PRESS HOME", "PRESS END", "PRESS PAGEUP", "PRESS PAGEDOWN"
-                                                                       "GO BACK",
-                            "GO FORWARD",
-                            "TERMINATE", "NONE"]
-
-        self.with_value_op = ["SELECT", "TYPE", "GOTO", "MEMORIZE", "SAY"]
-
-        self.no_element_op = ["PRESS ENTER", "SCROLL UP", "SCROLL DOWN", "NEW TAB", "CLOSE TAB", "GO BACK", "GOTO",
-                              "PRESS HOME", "PRESS END", "PRESS PAGEUP", "PRESS PAGEDOWN",
-                              "GO FORWARD",
-                              "TERMINATE", "NONE", "MEMORIZE", "SAY"]
+        self.no_value_op = _interned_set({"CLICK", "PRESS ENTER", "HOVER", "SCROLL UP", "SCROLL DOWN", "NEW TAB", "CLOSE TAB",
+                                          "PRESS HOME", "PRESS END", "PRESS PAGEUP", "PRESS PAGEDOWN",
+                                          "GO BACK",
+                                          "GO FORWARD",
+                                          "TERMINATE", "NONE"})
+
+        self.with_value_op = _interned_set({"SELECT", "TYPE", "GOTO", "MEMORIZE", "SAY"})
+
+        self.no_element_op = _interned_set({"PRESS ENTER", "SCROLL UP", "SCROLL DOWN", "NEW TAB", "CLOSE TAB", "GO BACK", "GOTO",
+                                            "PRESS HOME", "PRESS END", "PRESS PAGEUP", "PRESS PAGEDOWN",
+                                            "GO FORWARD",
+                                            "TERMINATE", "NONE", "MEMORIZE", "SAY"})
+
+        # Dispatch table for perform_action, built once instead of walking an if/elif chain per action
+        self._action_handlers = {sys.intern(name): handler for name, handler in {
+            "CLICK": self._do_click,
+            "HOVER": self._do_hover,
+            "TYPE": self._do_type,
+            "SCROLL UP": self._do_scroll_up,
+            "SCROLL DOWN": self._do_scroll_down,
+            "PRESS HOME": self._do_press_home,
+            "PRESS END": self._do_press_end,
+            "PRESS PAGEUP": self._do_press_pageup,
+            "PRESS PAGEDOWN": self._do_press_pagedown,
+            "NEW TAB": self._do_new_tab,
+            "CLOSE TAB": self._do_close_tab,
+            "GO BACK": self._do_go_back,
+            "GO FORWARD": self._do_go_forward,
+            "GOTO": self._do_goto,
+            "PRESS ENTER": self._do_press_enter,
+            "SELECT": self._do_select,
+            "TERMINATE": self._do_terminate,
+            "NONE": self._do_none,
+            "SAY": self._do_say,
+            "MEMORIZE": self._do_memorize,
+        }.items()}
+        self._requires_selector = _interned_set({"CLICK", "HOVER", "TYPE", "SELECT"})
+        self._requires_value = _interned_set({"GOTO"})
+        # Scrolling and key presses go straight to the page; the viewport is fixed, so the scroll scripts are too
+        half_height = self.settings.browser.viewport['height'] // 2
+        self._scroll_up_script = f"window.scrollBy(0, -{half_height});"
+        self._scroll_down_script = f"window.scrollBy(0, {half_height});"
 
         # Initialize the primary logger and the developer logger
         self.logger = self._setup_logger(redirect_to_dev_log=False)
         # self.dev_logger = self._setup_dev_logger()
 
         self.engine = engine_factory(**self.config['openai'])
-        self.taken_actions = []
+        # Bounded so very long sessions keep constant memory; the oldest actions fall off first (0 or None: unbounded)
+        self.taken_actions = deque(maxlen=self.settings.agent.max_history_retain or None)
+        # Number of entries ever recorded, which stays accurate once the oldest entries are dropped
+        self.num_recorded_actions = 0
 
-        if self.config["agent"]["grounding_strategy"] == "pixel_2_stage":
+        if self.settings.agent.grounding_strategy == "pixel_2_stage":
             self.prompts = self._initialize_prompts_pure_vision()
         self.prompts = self._initialize_prompts()
+        self._static_prompts = None
         self.time_step = 0
         self.valid_op = 0
         self.continuous_no_op = 0
         self.predictions = []
-        self.visited_links = []
+        self.visited_links = set()
+        self._trace_dirs_ready = False
         self._page = None
 
     def _initialize_prompts(self):
@@ -277,8 +331,9 @@ To be successful, it is important to follow the following rules:
     def update_action_space(self, new_actions):
         """Update the action space and regenerate the action_format prompt."""
         if isinstance(new_actions, list) and all(isinstance(item, str) for item in new_actions):
-            self.action_space = new_actions
+            self.action_space = [sys.intern(action) for action in new_actions]
             self.prompts["action_format"] = f"ACTION: Choose an action from {{{', '.join(self.action_space)}}}."
+            self._static_prompts = None
         else:
             print("Invalid action space provided. It must be a list of strings.")
 
@@ -290,7 +345,11 @@ To be successful, it is important to follow the following rules:
         if not logger.handlers:  # Avoid adding handlers multiple times
             # Create a file handler for writing logs to a file
             log_filename = 'agent.log'
-            f_handler = logging.FileHandler(os.path.join(self.main_path, log_filename))
+            if self.settings.basic.batch_log_writes:
+                # Buffer records and write them in batches instead of one write per record
+                f_handler = BatchedFileHandler(os.path.join(self.main_path, log_filename))
+            else:
+                f_handler = logging.FileHandler(os.path.join(self.main_path, log_filename))
             f_handler.setLevel(logging.INFO)
 
             # Create a console handler for printing logs to the terminal
@@ -305,10 +364,11 @@ To be successful, it is important to follow the following rules:
             f_handler.setFormatter(file_formatter)
             c_handler.setFormatter(console_formatter)
 
-            # Add the handlers to the logger
-            logger.addHandler(f_handler)
+            # Add the handlers behind a queue, so logging from the event loop does not wait on file or terminal I/O
+            handlers = [f_handler]
             if not redirect_to_dev_log:  # Only add console handler if not redirecting to dev log
-                logger.addHandler(c_handler)
+                handlers.append(c_handler)
+            attach_queue_listener(logger, *handlers)
 
         return logger
 
@@ -323,22 +383,24 @@ To be successful, it is important to follow the following rules:
                 if self.session_control['context'].pages:
                     self.page = self.session_control['context'].pages[-1]
                     await self.page.bring_to_front()
-                    self.logger.info(f"Switched the active tab to: {self.page.url}")
+                    self.logger.info("Switched the active tab to: %s", self.page.url)
                 else:
                     self.page = await self.session_control['context'].new_page()
                     try:
                         await self.page.goto("https://www.google.com/", wait_until="load")
                     except Exception as e:
-                        self.logger.info(f"Failed to navigate to Google: {e}")
-                    self.logger.info(f"Switched the active tab to: {self.page.url}")
+                        self.logger.info("Failed to navigate to Google: %s", e)
+                    self.logger.info("Switched the active tab to: %s", self.page.url)
 
     def save_action_history(self, filename="action_history.txt"):
         """Save the history of taken actions to a file in the main path."""
         history_path = os.path.join(self.main_path, filename)
         with open(history_path, 'w') as f:
-            for action in self.taken_actions:
-                f.write(action + '\n')
-        self.logger.info(f"Action history saved to: {history_path}")
+            # Join once so the whole history goes out in a single write
+            if self.taken_actions:
+                f.write('\n'.join(self.taken_actions))
+                f.write('\n')
+        self.logger.info("Action history saved to: %s", history_path)
 
     async def page_on_navigation_handler(self, frame):
         # Corrected to use 'self' for accessing class attributes
@@ -346,7 +408,7 @@ To be successful, it is important to follow the following rules:
 
     async def page_on_crash_handler(self, page):
         # Corrected logging method
-        self.logger.info(f"Page crashed: {page.url}")
+        self.logger.info("Page crashed: %s", page.url)
         self.logger.info("Try to reload")
         await page.reload()
 
@@ -358,7 +420,7 @@ To be successful, it is important to follow the following rules:
         self.page = page
         # Additional event listeners can be added here
         try:
-            if self.config["agent"]["grounding_strategy"] == "text_choice_som":
+            if self.settings.agent.grounding_strategy == "text_choice_som":
                 with open(os.path.join(dirname(__file__), "mark_page.js")) as f:
                     mark_page_script = f.read()
                 await self.session_control['active_page'].evaluate(mark_page_script)
@@ -366,52 +428,73 @@ To be successful, it is important to follow the following rules:
             pass
 
     async def start(self, headless=None, args=None, website=None):
-        self.playwright = await async_playwright().start()
-        self.session_control['browser'] = await normal_launch_async(self.playwright,
-                                                                    headless=self.config['browser'][
-                                                                        'headless'] if headless is None else headless,
-                                                                    args=self.config['browser'][
-                                                                        'args'] if args is None else args)
-        self.session_control['context'] = await normal_new_context_async(self.session_control['browser'],
-                                                                         viewport=self.config['browser'][
-                                                                             'viewport'])
+        # Contexts come from a shared browser pool, so several agents in one process reuse the same browser.
+        # Persistence restores cookies/local storage into an isolated context rather than locking a user data dir.
+        storage_state = self.storage_state_path
+        if storage_state is not None and not os.path.exists(storage_state):
+            storage_state = None
+        self.session_control['context'] = await acquire_context(self.config['browser'], headless=headless, args=args,
+                                                                storage_state=storage_state)
+        self.session_control['browser'] = self.session_control['context'].browser
 
         self.session_control['context'].on("page", self.page_on_open_handler)
         await self.session_control['context'].new_page()
 
-        if self.config["basic"]["crawler_mode"] is True:
+        if self.settings.basic.crawler_mode is True:
             await self.session_control['context'].tracing.start(screenshots=True, snapshots=True)
 
         try:
             await self.page.goto(
                 self.config['basic']['default_website'] if website is None else website,
                 wait_until="load")
-            self.logger.info(f"Loaded website: {self.config['basic']['default_website']}")
+            self.logger.info("Loaded website: %s", self.config['basic']['default_website'])
         except Exception as e:
             self.logger.info("Failed to fully load the webpage before timeout")
             self.logger.info(e)
 
             # await asyncio.sleep(2)
 
+    def _get_static_prompts(self):
+        """Build the parts of the prompt that do not change between steps once, and reuse them until a prompt part changes."""
+        if self._static_prompts is None:
+            self._static_prompts = {
+                "system_prompt": self.prompts["system_prompt"] + "\n" + self.prompts["action_space"],
+                "referring_head": referring_prompt_head(self.prompts["referring_description"]),
+                "referring_tail": referring_prompt_tail(self.prompts["element_format"], self.prompts["action_format"],
+                                                        self.prompts["value_format"]),
+            }
+        return self._static_prompts
+
     def update_prompt_part(self, part_name, new_text):
         """Update the specified part of the prompt information."""
         if part_name in self.prompts:
             self.prompts[part_name] = new_text
+            self._static_prompts = None
             return True
         else:
             print(f"Prompt part '{part_name}' not found.")
             return False
 
+    def _recent_actions(self):
+        """Return the tail of the action history that goes into the prompt, or None if there is no history."""
+        if not self.taken_actions:
+            return None
+        # Keep the per-step prompt size bounded instead of growing with every action taken
+        max_history = self.settings.agent.max_history_in_prompt
+        if max_history and len(self.taken_actions) > max_history:
+            return list(islice(self.taken_actions, len(self.taken_actions) - max_history, None))
+        return self.taken_actions
+
     def generate_prompt(self, task=None, previous=None, choices=None):
 
         """Generate a prompt based on the current task, previous actions, and choices."""
         # assert task is not None, "Please input the task."
 
         prompt_list = []
-        if self.config["agent"]["grounding_strategy"] == "pixel_2_stage":
+        if self.settings.agent.grounding_strategy == "pixel_2_stage":
             system_prompt_input = self.prompts["system_prompt"]
             question_description_input = self.prompts["question_description"]
-            previous_ = self.taken_actions if self.taken_actions else None
+            previous_ = self._recent_actions()
             prompt_list.extend(
                 generate_new_query_prompt(system_prompt=system_prompt_input,
                                           task=self.tasks[-1], previous_actions=previous_,
@@ -419,144 +502,149 @@ To be successful, it is important to follow the following rules:
             return prompt_list
         else:
 
-            system_prompt_input = self.prompts["system_prompt"]
-            action_space_input = self.prompts["action_space"]
+            static_prompts = self._get_static_prompts()
             question_description_input = self.prompts["question_description"]
-            referring_input = self.prompts["referring_description"]
-            element_format_input = self.prompts["element_format"]
-            action_format_input = self.prompts["action_format"]
-            value_format_input = self.prompts["value_format"]
 
-            previous_ = self.taken_actions if self.taken_actions else None
+            previous_ = self._recent_actions()
 
             # print(previous_)
 
             prompt_list.extend(
-                generate_new_query_prompt(system_prompt=system_prompt_input + "\n" + action_space_input,
+                generate_new_query_prompt(system_prompt=static_prompts["system_prompt"],
                                           task=self.tasks[-1], previous_actions=previous_,
                                           question_description=question_description_input))
-            prompt_list.append(
-                generate_new_referring_prompt(referring_description=referring_input,
-                                              element_format=element_format_input,
-                                              action_format=action_format_input, value_format=value_format_input,
-                                              choices=choices))
+            prompt_list.append("".join([static_prompts["referring_head"], format_options(choices) if choices else "",
+                                        static_prompts["referring_tail"]]))
 
             return prompt_list
 
-    async def perform_action(self, target_element=None, action_name=None, value=None, target_coordinates=None,
-                             element_repr=None):
+    async def _do_click(self, selector, value, target_coordinates, element_repr):
+        if selector == "pixel_coordinates":
+            delay = random.randint(50, 150)
+            await self.page.mouse.click(round(target_coordinates["x"]), round(target_coordinates["y"]), delay=delay)
+        else:
+            await selector.click(timeout=2000)
+            self.logger.info("Clicked on element: %s", element_repr)
 
-        if self.config["agent"]["grounding_strategy"] == "pixel_2_stage":
-            selector = "pixel_coordinates"
-        if target_element is not None:
-            selector = target_element['selector']
-            element_repr = target_element['description']
+    async def _do_hover(self, selector, value, target_coordinates, element_repr):
+        if selector == "pixel_coordinates":
+            delay = random.randint(50, 150)
+            await self.page.mouse.hover(round(target_coordinates["x"]), round(target_coordinates["y"]), delay=delay)
         else:
-            selector = None
+            await selector.hover(timeout=2000)
+            self.logger.info("Hovered over element: %s", element_repr)
+
+    async def _do_type(self, selector, value, target_coordinates, element_repr):
+        if selector == "pixel_coordinates":
+            delay = random.randint(50, 150)
+            await self.page.mouse.click(round(target_coordinates["x"]), round(target_coordinates["y"]), delay=delay)
+
+            await self.page.keyboard.press("Control+A")
+            await self.page.keyboard.press("Backspace")
+            # value = stringfy_value(action['fill_text'])
+            await self.page.keyboard.type(value)
+        else:
+            await selector.fill(value)
+            await selector.fill(value)
+            self.logger.info("Typed '%s' into element: %s", value, element_repr)
 
+    async def _do_scroll_up(self, selector, value, target_coordinates, element_repr):
+        await self.page.evaluate(self._scroll_up_script)
+        self.logger.info("Scrolled up")
 
-        page = self.page
+    async def _do_scroll_down(self, selector, value, target_coordinates, element_repr):
+        await self.page.evaluate(self._scroll_down_script)
+        self.logger.info("Scrolled down")
 
-        if action_name == "CLICK" and selector:
-            if selector == "pixel_coordinates":
-                delay = random.randint(50, 150)
-                await self.page.mouse.click(round(target_coordinates["x"]), round(target_coordinates["y"]), delay=delay)
-            else:
-                await selector.click(timeout=2000)
-                self.logger.info(f"Clicked on element: {element_repr}")
-        elif action_name == "HOVER" and selector:
+    async def _do_press_home(self, selector, value, target_coordinates, element_repr):
+        await self.page.keyboard.press('Home')
+        self.logger.info("Pressed Home key")
 
-            if selector == "pixel_coordinates":
-                delay = random.randint(50, 150)
-                await self.page.mouse.hover(round(target_coordinates["x"]), round(target_coordinates["y"]), delay=delay)
-            else:
-                await selector.hover(timeout=2000)
-                self.logger.info(f"Hovered over element: {element_repr}")
+    async def _do_press_end(self, selector, value, target_coordinates, element_repr):
+        await self.page.keyboard.press('End')
+        self.logger.info("Pressed End key")
 
+    async def _do_press_pageup(self, selector, value, target_coordinates, element_repr):
+        await self.page.keyboard.press('PageUp')
+        self.logger.info("Pressed PageUp key")
 
+    async def _do_press_pagedown(self, selector, value, target_coordinates, element_repr):
+        await self.page.keyboard.press('PageDown')
+        self.logger.info("Pressed PageDown key")
 
-        elif action_name == "TYPE" and selector:
+    async def _do_new_tab(self, selector, value, target_coordinates, element_repr):
+        await self.session_control['context'].new_page()
+        self.logger.info("Opened a new tab")
 
-            if selector == "pixel_coordinates":
-                delay = random.randint(50, 150)
-                await self.page.mouse.click(round(target_coordinates["x"]), round(target_coordinates["y"]), delay=delay)
+    async def _do_close_tab(self, selector, value, target_coordinates, element_repr):
+        await self.page.close()
+        self.logger.info("Closed the current tab")
 
-                await self.page.keyboard.press("Control+A")
-                await self.page.keyboard.press("Backspace")
-                # value = stringfy_value(action['fill_text'])
-                await self.page.keyboard.type(value)
-            else:
-                await selector.fill(value)
-                await selector.fill(value)
-                self.logger.info(f"Typed '{value}' into element: {element_repr}")
-
-        elif action_name == "SCROLL UP":
-            await page.evaluate(f"window.scrollBy(0, -{self.config['browser']['viewport']['height'] // 2});")
-            self.logger.info("Scrolled up")
-        elif action_name == "SCROLL DOWN":
-            await page.evaluate(f"window.scrollBy(0, {self.config['browser']['viewport']['height'] // 2});")
-            self.logger.info("Scrolled down")
-        elif action_name == "PRESS HOME":
-            await page.keyboard.press('Home')
-            self.logger.info("Pressed Home key")
-        elif action_name == "PRESS END":
-            await page.keyboard.press('End')
-            self.logger.info("Pressed End key")
-        elif action_name == "PRESS PAGEUP":
-            await page.keyboard.press('PageUp')
-            self.logger.info("Pressed PageUp key")
-        elif action_name == "PRESS PAGEDOWN":
-            await page.keyboard.press('PageDown')
-            self.logger.info("Pressed PageDown key")
-        elif action_name == "NEW TAB":
-            new_page = await self.session_control['context'].new_page()
-            # self.session_control['pages'].append(new_page)
-            self.logger.info("Opened a new tab")
-        elif action_name == "CLOSE TAB":
-            await page.close()
-            self.logger.info("Closed the current tab")
-        elif action_name == "GO BACK":
-            await page.go_back()
-            self.logger.info("Navigated back")
-        elif action_name == "GO FORWARD":
-            await page.go_forward()
-            self.logger.info("Navigated forward")
-        elif action_name == "GOTO" and value:
-            await page.goto(value, wait_until="load")
-            self.logger.info(f"Navigated to {value}")
-        elif action_name == "PRESS ENTER" and selector:
+    async def _do_go_back(self, selector, value, target_coordinates, element_repr):
+        await self.page.go_back()
+        self.logger.info("Navigated back")
+
+    async def _do_go_forward(self, selector, value, target_coordinates, element_repr):
+        await self.page.go_forward()
+        self.logger.info("Navigated forward")
+
+    async def _do_goto(self, selector, value, target_coordinates, element_repr):
+        await self.page.goto(value, wait_until="load")
+        self.logger.info("Navigated to %s", value)
+
+    async def _do_press_enter(self, selector, value, target_coordinates, element_repr):
+        if selector:
             if selector == "pixel_coordinates":
                 delay = random.randint(50, 150)
                 await self.page.mouse.click(round(target_coordinates["x"]), round(target_coordinates["y"]), delay=delay)
             await selector.press('Enter')
-            self.logger.info(f"Pressed Enter on element: {element_repr}")
-        elif action_name == "PRESS ENTER":
-            await page.keyboard.press('Enter')
-            self.logger.info(f"Pressed Enter on element: {element_repr}")
-        elif action_name == "SELECT" and selector:
-            await select_option(selector, value)
-            self.logger.info(f"Selected option '{value}' from element: {element_repr}")
-        elif action_name == "TERMINATE":
-            self.complete_flag = True
-            self.logger.info("Task has been marked as complete. Terminating...")
-        elif action_name in ["NONE"]:
-            self.logger.info("No action necessary at this stage. Skipped")
-        elif action_name in ["SAY"]:
-            self.logger.info(f"Say {value} to the user")
-        elif action_name in ["MEMORIZE"]:
-            self.logger.info(f"Keep {value} to the action history.")
         else:
+            await self.page.keyboard.press('Enter')
+        self.logger.info("Pressed Enter on element: %s", element_repr)
+
+    async def _do_select(self, selector, value, target_coordinates, element_repr):
+        await select_option(selector, value)
+        self.logger.info("Selected option '%s' from element: %s", value, element_repr)
+
+    async def _do_terminate(self, selector, value, target_coordinates, element_repr):
+        self.complete_flag = True
+        self.logger.info("Task has been marked as complete. Terminating...")
+
+    async def _do_none(self, selector, value, target_coordinates, element_repr):
+        self.logger.info("No action necessary at this stage. Skipped")
+
+    async def _do_say(self, selector, value, target_coordinates, element_repr):
+        self.logger.info("Say %s to the user", value)
+
+    async def _do_memorize(self, selector, value, target_coordinates, element_repr):
+        self.logger.info("Keep %s to the action history.", value)
+
+    async def perform_action(self, target_element=None, action_name=None, value=None, target_coordinates=None,
+                             element_repr=None):
+
+        if self.settings.agent.grounding_strategy == "pixel_2_stage":
+            selector = "pixel_coordinates"
+        if target_element is not None:
+            selector = target_element['selector']
+            element_repr = target_element['description']
+        else:
+            selector = None
+
+        handler = self._action_handlers.get(action_name)
+        if handler is None or (action_name in self._requires_selector and not selector) or \
+                (action_name in self._requires_value and not value):
             raise Exception(f"Unsupported or improperly specified action: {action_name}")
-        if action_name in self.no_element_op and target_element is None:
+        await handler(selector, value, target_coordinates, element_repr)
+
+        # element_repr already holds the target description, so the history entry is built from locals in one go
+        if target_element is None and action_name in self.no_element_op:
             new_action = action_name
+        elif selector == "pixel_coordinates":
+            new_action = f"{element_repr} -> {action_name}"
         else:
-            if selector == "pixel_coordinates":
-                new_action = element_repr + " -> " + action_name
-            else:
-                new_action = "[" + target_element['tag_with_role'] + "]" + " "
-                new_action += target_element['description'] + " -> " + action_name
+            new_action = f"[{target_element['tag_with_role']}] {element_repr} -> {action_name}"
         if action_name in self.with_value_op:
-            new_action += ": " + value
+            new_action = f"{new_action}: {value}"
 
         # self.dev_logger.info(new_action)
         return new_action
@@ -575,7 +663,7 @@ To be successful, it is important to follow the following rules:
             pass
 
         elements = await get_interactive_elements_with_playwright(self.page,
-                                                                  self.config['browser']['viewport'])
+                                                                  self.settings.browser.viewport)
 
         '''
              0: center_point =(x,y)
@@ -592,31 +680,35 @@ To be successful, it is important to follow the following rules:
         elements = [{**x, "idx": i, "option": generate_option_name(i)} for i, x in enumerate(elements)]
 
         # In crawler mode, get random link and click on it
-        if self.config["basic"]["crawler_mode"] is True:
-            if self.time_step > self.config["basic"]["crawler_max_steps"]:
+        if self.settings.basic.crawler_mode is True:
+            if self.time_step > self.settings.basic.crawler_max_steps:
                 self.logger.info("Crawler reached max steps, going to stop")
                 self.complete_flag = True
                 return None
 
             links = [x for x in elements if x['tag_with_role'] == 'a']
-            random_link = get_random_link(links)
-            while random_link in self.visited_links and len(links) > 0:
-                random_link = get_random_link(links)
-            if random_link is None:
+            # Only the crawler needs link targets, so they are fetched here rather than during element scanning
+            hrefs = await asyncio.gather(*(get_link_href(x['selector']) for x in links))
+            for link, href in zip(links, hrefs):
+                link['href'] = href
+            frontier = build_link_frontier(links, self.visited_links, self.page.url)
+            picked = get_random_link(list(frontier.items()))
+            if picked is None:
                 return None
+            random_link_key, random_link = picked
 
             prediction = {"action_generation": "Random chosen link", "action_grounding": "Random chosen link",
                           "element": random_link,
                           "action": "CLICK", "value": 'None'}
             self.predictions.append(prediction)
-            self.visited_links.append(random_link)
+            self.visited_links.add(random_link_key)
             self.logger.info(prediction)
             await self.take_screenshot()
             await self.start_playwright_tracing()
             return prediction
 
         try:
-            if self.config["agent"]["grounding_strategy"] == "text_choice_som":
+            if self.settings.agent.grounding_strategy == "text_choice_som":
                 with open(os.path.join(dirname(__file__), "mark_page.js")) as f:
                     mark_page_script = f.read()
                 await self.page.evaluate(mark_page_script)
@@ -625,7 +717,7 @@ To be successful, it is important to follow the following rules:
                     return window.som.drawBoxes(elements);
                     }""", elements)
         except Exception as e:
-            self.logger.info(f"Mark page script error {e}")
+            self.logger.info("Mark page script error %s", e)
 
         # Generate choices for the prompt
 
@@ -645,12 +737,12 @@ To be successful, it is important to follow the following rules:
         try:
             await self.page.screenshot(path=screenshot_path)
         except Exception as e:
-            self.logger.info(f"Failed to take screenshot: {e}")
+            self.logger.info("Failed to take screenshot: %s", e)
 
         terminal_width = 10
-        self.logger.info(f"Step - {self.time_step}\n{'-' * terminal_width}\nAction Generation ➡️")
+        self.logger.info("Step - %s\n%s\nAction Generation ➡️", self.time_step, '-' * terminal_width)
         # for prompt_part in prompt:
-        self.logger.info("TASK: " + self.tasks[-1])
+        self.logger.info("TASK: %s", self.tasks[-1])
         self.logger.info("Previous:")
         for action in self.taken_actions:
             self.logger.info(action)
@@ -666,7 +758,7 @@ To be successful, it is important to follow the following rules:
 
         terminal_width = 10
         self.logger.info("-" * (terminal_width))
-        if self.config["agent"]["grounding_strategy"] == "pixel_2_stage":
+        if self.settings.agent.grounding_strategy == "pixel_2_stage":
 
             choice_text = f"Action Grounding ➡️" + "\n" + options
             for line in choice_text.split('\n'):
@@ -678,10 +770,11 @@ To be successful, it is important to follow the following rules:
 
             pred_element = pred_element_label
             # Log the prediction result
-            self.logger.debug(f"Retrieved Answer")
-            self.logger.debug(f"Predicted Element: {pred_element}")
-            self.logger.debug(f"Action: {pred_action}")
-            self.logger.debug(f"Value: {pred_value}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Retrieved Answer")
+                self.logger.debug("Predicted Element: %s", pred_element)
+                self.logger.debug("Action: %s", pred_action)
+                self.logger.debug("Value: %s", pred_value)
 
             # Call a GUI visual grounding model to get the pixel coordinates. For example, UGround, CogAgent, SeeClick.
             pred_coordinates = None
@@ -714,10 +807,11 @@ To be successful, it is important to follow the following rules:
             else:
                 pred_element = None
             # Log the prediction result
-            self.logger.debug(f"Retrieved Answer")
-            self.logger.debug(f"Predicted Element: {pred_element}")
-            self.logger.debug(f"Action: {pred_action}")
-            self.logger.debug(f"Value: {pred_value}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Retrieved Answer")
+                self.logger.debug("Predicted Element: %s", pred_element)
+                self.logger.debug("Action: %s", pred_action)
+                self.logger.debug("Value: %s", pred_value)
 
             prediction = {"action_generation": output0, "action_grounding": output, "element": pred_element,
                           "action": pred_action, "value": pred_value}
@@ -742,7 +836,7 @@ To be successful, it is important to follow the following rules:
 
         try:
             # Clear the marks before action
-            if self.config["agent"]["grounding_strategy"] == "text_choice_som":
+            if self.settings.agent.grounding_strategy == "text_choice_som":
                 await self.page.evaluate("unmarkPage()")
         except Exception as e:
             pass
@@ -754,23 +848,23 @@ To be successful, it is important to follow the following rules:
         pred_element_description=None
         if "description" in prediction_dict:
             pred_element_description=prediction_dict["description"]
-        if self.config["agent"]["grounding_strategy"] == "pixel_2_stage":
+        if self.settings.agent.grounding_strategy == "pixel_2_stage":
             pred_coordinate = prediction_dict["coordinates"]
 
         try:
             if (pred_action not in self.no_element_op) and pred_element == None:
                 # self.dev_logger.info
-                self.logger.info("DEBUG: WHAT IS PRED ACTION???:" + pred_action)
+                self.logger.info("DEBUG: WHAT IS PRED ACTION???:%s", pred_action)
                 # self.dev_logger.info("DEBUG WHAT IS self.no_element_op???:"+ self.no_element_op)
                 pred_action = "NONE"
             new_action = await self.perform_action(pred_element, pred_action, pred_value, pred_coordinate,pred_element_description)
-            self.taken_actions.append(new_action)
+            self._record_action(new_action)
             if pred_action != "NONE":
                 self.valid_op += 1
                 self.continuous_no_op = 0
             else:
                 self.continuous_no_op += 1
-            if self.config["basic"]["crawler_mode"] is True:
+            if self.settings.basic.crawler_mode is True:
                 await self.stop_playwright_tracing()
                 await self.save_traces()
 
@@ -786,22 +880,33 @@ To be successful, it is important to follow the following rules:
             error_message_with_traceback = f"{error_message}\n\nTraceback:\n{traceback_info}"
 
             self.logger.info(new_action)
-            self.taken_actions.append(new_action)
+            self._record_action(new_action)
             self.continuous_no_op += 1
             return 1
 
     async def stop(self):
 
-        try:
-            close_context = self.session_control['context']
-            self.session_control['context'] = None
-            await close_context.close()
-            self.logger.info("Browser context closed.")
-        except Exception as e:
-            self.logger.info(e)
+        close_context = self.session_control['context']
+        self.session_control['context'] = None
+        if close_context is not None:
+            try:
+                if self.storage_state_path is not None:
+                    try:
+                        os.makedirs(dirname(self.storage_state_path) or '.', exist_ok=True)
+                        await close_context.storage_state(path=self.storage_state_path)
+                        self.logger.info("Browser storage state saved to: %s", self.storage_state_path)
+                    except Exception as e:
+                        self.logger.info("Failed to save browser storage state: %s", e)
+            finally:
+                # Always hand the context back, otherwise it stays open on the shared browser
+                try:
+                    await release_context(close_context)
+                    self.logger.info("Browser context closed.")
+                except Exception as e:
+                    self.logger.info(e)
 
         final_json = {"task": self.tasks, "website": self.config["basic"]["default_website"],
-                      "num_step": len(self.taken_actions), "action_history": self.taken_actions}
+                      "num_step": self.num_recorded_actions, "action_history": list(self.taken_actions)}
 
         def locator_serializer(obj):
             """Convert non-serializable objects to a serializable format."""
@@ -817,14 +922,20 @@ To be successful, it is important to follow the following rules:
         with open(os.path.join(self.main_path, 'result.json'), 'w', encoding='utf-8') as file:
             json.dump(final_json, file, indent=4)
         self.logger.info("Agent stopped.")
+        flush_logger(self.logger)
 
         saveconfig(self.config, os.path.join(self.main_path, 'config.toml'))
 
+    def _record_action(self, action):
+        self.taken_actions.append(action)
+        self.num_recorded_actions += 1
+
     def clear_action_history(self):
         """
         Clears the history of actions taken by the agent.
         """
         self.taken_actions.clear()
+        self.num_recorded_actions = 0
         self.logger.info("Cleared action history.")
 
     def reset_comlete_flag(self, flag=False):
@@ -839,13 +950,13 @@ To be successful, it is important to follow the following rules:
         """
         if new_task and isinstance(new_task, str):
 
-            self.logger.info(f"Changed task from {self.tasks[-1]} to: {new_task}")
+            self.logger.info("Changed task from %s to: %s", self.tasks[-1], new_task)
             self.tasks.append(new_task)
             # Optionally clear action history when changing task
             if clear_history:
                 self.clear_action_history()
             else:
-                self.taken_actions.append(f"Changed task from {self.tasks[-2]} to: {new_task}")
+                self._record_action(f"Changed task from {self.tasks[-2]} to: {new_task}")
 
         else:
             self.logger.info("Invalid new task. It must be a non-empty string.")
@@ -860,7 +971,7 @@ To be successful, it is important to follow the following rules:
         try:
             await self.page.screenshot(path=self.screenshot_path)
         except Exception as e:
-            self.logger.info(f"Failed to take screenshot: {e}")
+            self.logger.info("Failed to take screenshot: %s", e)
 
     async def start_playwright_tracing(self):
         await self.session_control['context'].tracing.start_chunk(
@@ -872,15 +983,19 @@ To be successful, it is important to follow the following rules:
         await self.session_control['context'].tracing.stop_chunk(path=self.trace_path)
 
     async def save_traces(self):
-        # Capture the DOM tree
-        dom_tree = await self.page.evaluate("document.documentElement.outerHTML")
-        os.makedirs(os.path.join(self.main_path, 'dom'), exist_ok=True)
+        # Output directories only need to be created for the first checkpoint of the run
+        if not self._trace_dirs_ready:
+            os.makedirs(os.path.join(self.main_path, 'dom'), exist_ok=True)
+            os.makedirs(os.path.join(self.main_path, 'accessibility'), exist_ok=True)
+            self._trace_dirs_ready = True
+
+        # Capture the DOM tree and the Accessibility Tree in parallel
+        dom_tree, accessibility_tree = await asyncio.gather(
+            self.page.evaluate("document.documentElement.outerHTML"),
+            self.page.accessibility.snapshot())
         with open(self.dom_tree_path, 'w', encoding='utf-8') as f:
             f.write(dom_tree)
 
-        # Capture the Accessibility Tree
-        accessibility_tree = await self.page.accessibility.snapshot()
-        os.makedirs(os.path.join(self.main_path, 'accessibility'), exist_ok=True)
         with open(self.accessibility_tree_path, 'w', encoding='utf-8') as f:
             f.write(json.dumps(accessibility_tree, indent=4))
 
@@ -894,6 +1009,13 @@ To be successful, it is important to follow the following rules:
     def page(self, value):
         self._page = value
 
+    @property
+    def storage_state_path(self):
+        if not self.settings.browser.persistant:
+            return None
+        user_path = self.settings.browser.persistant_user_path or self.settings.basic.save_file_dir
+        return os.path.join(user_path, 'storage_state.json')
+
     @property
     def screenshot_path(self):
         return os.path.join(self.main_path, 'screenshots', f'screen_{self.time_step}.png')